@@ -1,27 +1,76 @@
 import azure.functions as func
 import logging
 import traceback
+import asyncio
 import os
 import json
 import io
 import re
+import codecs
+import threading
 from datetime import datetime
-from typing import List, Optional, Tuple, Dict
+from functools import lru_cache
+from urllib.parse import urlparse
+from typing import Iterable, Iterator, List, Optional, Tuple, Dict
 from azure.core.exceptions import AzureError
-from azure.storage.blob import BlobServiceClient
+from azure.storage.blob import StorageStreamDownloader
 from azure.core.credentials import AzureKeyCredential
-from azure.search.documents import SearchClient
+from azure.search.documents.aio import SearchClient
 from azure.core.credentials_async import AsyncTokenCredential
 from openai import AsyncAzureOpenAI
 from tenacity import retry, stop_after_attempt, wait_exponential
-from PyPDF2 import PdfReader
+import pymupdf
+import tiktoken
+from shared_code.blob_storage import get_blob_service_client
 
 logger = logging.getLogger("BlobIndexTrigger")
 
+@lru_cache(maxsize=None)
+def get_encoding() -> tiktoken.Encoding:
+    """
+    Return the ada-002 tokenizer shared by chunking and embedding truncation.
+    Loaded on first use, since tiktoken may download its BPE file and that
+    should not add to cold starts or break the module import when offline.
+    """
+    return tiktoken.encoding_for_model("text-embedding-ada-002")
+
+def count_tokens(text: str) -> int:
+    """Count embedding model tokens in text"""
+    return len(get_encoding().encode(text, disallowed_special=()))
+
+# Longest word whose token count is memoized; longer strings rarely repeat
+MAX_CACHED_WORD_CHARS = 64
+
+@lru_cache(maxsize=4096)
+def count_word_tokens(word: str) -> int:
+    """Count tokens in a short word, memoized since words repeat throughout a document"""
+    return count_tokens(word)
+
+_WS_RE = re.compile(r'\s+')
+_SENT_RE = re.compile(r'(?<=[.!?])\s+')
+_PARA_RE = re.compile(r'\n\s*\n')
+
+# Azure AI Search accepts at most 1000 documents and 16MB per indexing request. Each document
+# carries a 1536-float embedding and up to ~2000 tokens of content (~40-60KB of JSON),
+# so 200 documents stay under the size limit where 500 (~21MB) would be rejected with a 413
+UPLOAD_BATCH_SIZE = 200
+
+# Containers whose blobs are indexed, e.g. "evidencefiles,reports"
+INDEXED_CONTAINERS = {
+    name.strip() for name in os.environ.get("INDEXED_CONTAINERS", "evidencefiles").split(",") if name.strip()
+}
+
+# Longest unterminated text kept waiting for a sentence boundary between chunks
+MAX_CARRY_CHARS = 100_000
+
 class File:
-    def __init__(self, filename: str, content: Optional[bytes] = None, content_type: str = None):
+    __slots__ = ('name', '_content', '_stream', 'content_type', 'acls')
+
+    def __init__(self, filename: str, content: Optional[bytes] = None, content_type: str = None,
+                 stream: Optional[StorageStreamDownloader] = None):
         self.name = filename
         self._content = content
+        self._stream = stream
         self.content_type = content_type
         self.acls = {}
 
@@ -31,94 +80,203 @@ class File:
     def filename_to_id(self) -> str:
         return self.name.replace('/', '_').replace('.', '_')
 
-    async def get_content(self) -> bytes:
+    def is_pdf(self) -> bool:
+        return (self.content_type or '').lower() == 'application/pdf' or self.name.lower().endswith('.pdf')
+
+    def read_content(self) -> bytes:
+        """Read the whole content. Streamed content is not kept on the File, so it is freed
+        once parsed instead of living as long as the sections that reference this File"""
+        if self._content is None and self._stream is not None:
+            # Preallocate the buffer at the blob's size so parallel ranged downloads write in
+            # place, and getvalue() hands back that same buffer instead of a second copy
+            buffer = io.BytesIO()
+            if self._stream.size:
+                buffer.seek(self._stream.size - 1)
+                buffer.write(b'\0')
+                buffer.seek(0)
+            self._stream.readinto(buffer)
+            return buffer.getvalue()
         return self._content
 
+    async def get_content(self) -> bytes:
+        return self.read_content()
+
+    def iter_chunks(self) -> Iterator[bytes]:
+        """Yield the content as it is downloaded, without buffering the whole blob"""
+        if self._content is not None:
+            yield self._content
+        elif self._stream is not None:
+            yield from self._stream.chunks()
+
 class SplitPage:
-    def __init__(self, text: str, page_num: int = 0):
+    __slots__ = ('text', 'page_num', 'token_count')
+
+    def __init__(self, text: str, page_num: int = 0, token_count: Optional[int] = None):
         self.text = text
         self.page_num = page_num
+        self.token_count = token_count
 
 class TextSplitter:
-    def __init__(self, max_tokens: int = 2000):  # Conservative token limit
+    def __init__(self, max_tokens: int = 2000, overlap_tokens: int = 200):  # Conservative token limit
         self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens  # Tail of each section repeated at the start of the next
         
-    async def extract_text(self, file: File) -> str:
-        content = await file.get_content()
+    def extract_pdf_text(self, content: bytes) -> str:
+        with pymupdf.open(stream=content, filetype="pdf") as pdf_document:
+            # Extract text from each page and join once, rather than growing one string per page
+            return "\n\n".join([page.get_text() for page in pdf_document])
+
+    def decode_chunks(self, chunks: Iterable[bytes]) -> Iterator[str]:
+        """Incrementally decode UTF-8, switching to latin-1 from the first undecodable chunk"""
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        for chunk in chunks:
+            try:
+                text = decoder.decode(chunk)
+            except UnicodeDecodeError:
+                # Not UTF-8 after all, so decode the rest (including buffered bytes) as latin-1
+                pending = decoder.getstate()[0]
+                decoder = codecs.getincrementaldecoder('latin-1')()
+                text = decoder.decode(pending + chunk)
+            yield text
+        try:
+            yield decoder.decode(b'', final=True)
+        except UnicodeDecodeError:
+            yield decoder.getstate()[0].decode('latin-1')
+
+    def iter_text(self, file: File) -> Iterator[str]:
+        """Yield the file's text in pieces as the content is read"""
         try:
             # Handle PDF files
-            if file.content_type.lower() == 'application/pdf' or file.name.lower().endswith('.pdf'):
-                pdf_file = io.BytesIO(content)
-                pdf_reader = PdfReader(pdf_file)
-                
-                # Extract text from each page
-                text = ""
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n\n"
-                
-                return text.strip()
+            if file.is_pdf():
+                yield self.extract_pdf_text(file.read_content())
             else:
                 # Handle text files
-                try:
-                    text = content.decode('utf-8')
-                    return text.strip()
-                except UnicodeDecodeError:
-                    text = content.decode('latin-1')
-                    return text.strip()
+                yield from self.decode_chunks(file.iter_chunks())
                 
         except Exception as e:
             logger.error(f"Error extracting text: {str(e)}")
             raise
 
-    def split_text(self, text: str) -> List[SplitPage]:
-        # Clean the text
-        text = re.sub(r'\s+', ' ', text).strip()
-        
-        # Split into sentences (roughly)
-        sentences = re.split(r'(?<=[.!?])\s+', text)
-        
-        sections = []
-        current_section = []
+    def split_oversized(self, unit: str) -> Iterator[Tuple[str, int]]:
+        """Split a sentence longer than max_tokens on whitespace, then on token boundaries"""
+        words = []
+        length = 0
+        for word in unit.split(' '):
+            if len(word) <= MAX_CACHED_WORD_CHARS:
+                word_length = count_word_tokens(' ' + word)
+            else:
+                word_length = count_tokens(' ' + word)
+            if word_length > self.max_tokens:
+                # A single "word" this long is not prose, so cut it by tokens
+                encoding = get_encoding()
+                ids = encoding.encode(word, disallowed_special=())
+                for start in range(0, len(ids), self.max_tokens):
+                    piece = ids[start:start + self.max_tokens]
+                    yield encoding.decode(piece), len(piece)
+                continue
+            if words and length + word_length > self.max_tokens:
+                yield ' '.join(words), length
+                words = []
+                length = 0
+            words.append(word)
+            length += word_length
+        if words:
+            yield ' '.join(words), length
+
+    def split_pages(self, pieces: Iterable[str]) -> Iterator[SplitPage]:
+        """Split streamed text into overlapping sections, yielding each as soon as it is full"""
+        current_section: List[Tuple[str, int]] = []
         current_length = 0
         section_number = 0
+        has_new_text = False
+        
+        def complete_units(pieces: Iterable[str]) -> Iterator[str]:
+            carry = ""
+            for piece in pieces:
+                # Split into paragraphs, then sentences (roughly), holding back the last one
+                # as it may continue in the next piece
+                units = [
+                    sentence
+                    for paragraph in _PARA_RE.split(carry + piece)
+                    for sentence in _SENT_RE.split(paragraph)
+                ]
+                carry = units.pop()
+                if not units and len(carry) > MAX_CARRY_CHARS:
+                    # No sentence boundary in sight, so break at the last whitespace instead
+                    cut = max(carry.rfind(c) for c in ' \t\r\n')
+                    if cut > 0:
+                        units, carry = [carry[:cut]], carry[cut + 1:]
+                    else:
+                        units, carry = [carry], ""
+                yield from units
+            yield carry
+        
+        def token_units(pieces: Iterable[str]) -> Iterator[Tuple[str, int]]:
+            for unit in complete_units(pieces):
+                # Clean the text
+                unit = _WS_RE.sub(' ', unit).strip()
+                if not unit:
+                    continue
+                
+                # Tokenize each unit once and reuse the count for chunk sizing
+                unit_length = count_tokens(unit)
+                if unit_length > self.max_tokens:
+                    yield from self.split_oversized(unit)
+                else:
+                    yield unit, unit_length
         
-        for sentence in sentences:
-            # Estimate tokens (very conservatively)
-            sentence_length = len(sentence.split())
+        for unit, unit_length in token_units(pieces):
+            # If adding this unit would exceed the limit
+            if current_length + unit_length > self.max_tokens and has_new_text:
+                # Create a section from accumulated units
+                yield SplitPage(
+                    text=' '.join(text for text, _ in current_section),
+                    page_num=section_number,
+                    token_count=current_length
+                )
+                section_number += 1
+                logger.info(f"Created section {section_number} with {current_length} tokens")
+                
+                # Seed the next section with the tail of this one, so text spanning the boundary
+                # is still retrievable from a single section
+                overlap = []
+                overlap_length = 0
+                for text, length in reversed(current_section):
+                    if overlap_length + length > self.overlap_tokens:
+                        break
+                    overlap.append((text, length))
+                    overlap_length += length
+                overlap.reverse()
+                current_section = overlap
+                current_length = overlap_length
+                has_new_text = False
             
-            # If adding this sentence would exceed the limit
-            if current_length + sentence_length > self.max_tokens:
-                if current_section:
-                    # Create a section from accumulated sentences
-                    section_text = ' '.join(current_section)
-                    sections.append(SplitPage(
-                        text=section_text,
-                        page_num=section_number
-                    ))
-                    section_number += 1
-                    logger.info(f"Created section {section_number} with ~{current_length} tokens")
-                    
-                    # Reset accumulator
-                    current_section = []
-                    current_length = 0
+            # Drop overlap that would push this unit over the limit
+            while current_section and current_length + unit_length > self.max_tokens:
+                current_length -= current_section.pop(0)[1]
             
-            # Add the sentence to current section
-            current_section.append(sentence)
-            current_length += sentence_length
+            # Add the unit to current section
+            current_section.append((unit, unit_length))
+            current_length += unit_length
+            has_new_text = True
         
         # Don't forget the last section
-        if current_section:
-            section_text = ' '.join(current_section)
-            sections.append(SplitPage(
-                text=section_text,
-                page_num=section_number
-            ))
-            logger.info(f"Created final section {section_number + 1} with ~{current_length} tokens")
-        
+        if has_new_text:
+            yield SplitPage(
+                text=' '.join(text for text, _ in current_section),
+                page_num=section_number,
+                token_count=current_length
+            )
+            logger.info(f"Created final section {section_number + 1} with {current_length} tokens")
+
+    def split_text(self, text: str) -> List[SplitPage]:
+        sections = list(self.split_pages([text]))
         logger.info(f"Split text into {len(sections)} sections")
         return sections
 
 class Section:
+    __slots__ = ('split_page', 'content', 'category', 'title', 'urls')
+
     def __init__(self, split_page: SplitPage, content: File, category: Optional[str] = None,
                  title: Optional[str] = None, urls: Optional[List[str]] = None):
         self.split_page = split_page
@@ -128,108 +286,179 @@ class Section:
         self.urls = urls or []
 
 class OpenAIEmbeddings:
-    def __init__(self, endpoint: str, deployment: str, api_key: str):
+    def __init__(self, endpoint: str, deployment: str, api_key: str, batch_size: int = 16,
+                 max_concurrency: int = 8):
         self.endpoint = endpoint.rstrip('/')
         self.deployment = deployment
         self.api_key = api_key
         self.model = "text-embedding-ada-002"
         self.dimensions = 1536
         self.max_tokens = 8000
-
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
-    async def create_embeddings(self, texts: List[str]) -> List[List[float]]:
-        client = AsyncAzureOpenAI(
+        self.batch_size = batch_size  # Inputs per embeddings request
+        self.max_batch_tokens = 8 * self.max_tokens  # Combined token budget per request
+        self.max_concurrency = max_concurrency  # Embeddings requests in flight
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.client = AsyncAzureOpenAI(
             api_key=self.api_key,
             azure_endpoint=self.endpoint,
             api_version="2023-05-15"
         )
 
-        embeddings = []
-        
-        for i, text in enumerate(texts):
-            try:
-                # Count tokens more accurately
-                token_count = len(text.split())
-                if token_count > self.max_tokens:
-                    logger.warning(f"Text {i+1} too long ({token_count} tokens). Truncating...")
-                    # Truncate by words to be safe
-                    words = text.split()[:self.max_tokens]
-                    text = ' '.join(words)
-                
-                response = await client.embeddings.create(
-                    input=text,
-                    model=self.model
-                )
-                embeddings.append(response.data[0].embedding)
-                logger.info(f"Created embedding {i+1} of {len(texts)} (size: {len(response.data[0].embedding)})")
-            except Exception as e:
-                logger.error(f"Error creating embedding {i+1}: {str(e)}")
-                raise
+    def _truncate(self, i: int, text: str, token_count: Optional[int] = None) -> Tuple[str, int]:
+        # Reuse the splitter's count when available
+        if token_count is None:
+            token_count = count_tokens(text)
+        if token_count > self.max_tokens:
+            logger.warning(f"Text {i+1} too long ({token_count} tokens). Truncating...")
+            # Truncate on token boundaries so the request is exactly within the model limit
+            encoding = get_encoding()
+            token_ids = encoding.encode(text, disallowed_special=())[:self.max_tokens]
+            text = encoding.decode(token_ids)
+            token_count = len(token_ids)
+        return text, token_count
+
+    def _batches(self, texts: List[str], token_counts: Optional[List[Optional[int]]] = None) -> List[List[str]]:
+        """Group texts into requests bounded by input count and combined tokens"""
+        batches = []
+        batch = []
+        batch_tokens = 0
+        token_counts = token_counts or [None] * len(texts)
+
+        for i, (text, token_count) in enumerate(zip(texts, token_counts)):
+            text, token_count = self._truncate(i, text, token_count)
+            if batch and (len(batch) >= self.batch_size or batch_tokens + token_count > self.max_batch_tokens):
+                batches.append(batch)
+                batch = []
+                batch_tokens = 0
+            batch.append(text)
+            batch_tokens += token_count
+
+        if batch:
+            batches.append(batch)
+        return batches
+
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
+    async def _embed_batch(self, batch: List[str]) -> List[List[float]]:
+        response = await self.client.embeddings.create(
+            input=batch,
+            model=self.model
+        )
+        # The service may return items out of order, so sort by index
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+    async def create_embeddings(self, texts: List[str],
+                                token_counts: Optional[List[Optional[int]]] = None) -> List[List[float]]:
+        batches = self._batches(texts, token_counts)
+        # Shared across calls so concurrent windows of one document stay within max_concurrency
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        semaphore = self._semaphore
+        results: List[List[List[float]]] = [[] for _ in batches]
+
+        async def embed(index: int, batch: List[str]) -> None:
+            async with semaphore:
+                try:
+                    results[index] = await self._embed_batch(batch)
+                    logger.info(f"Created embeddings for batch {index+1} of {len(batches)} ({len(batch)} texts)")
+                except Exception as e:
+                    logger.error(f"Error creating embeddings for batch {index+1}: {str(e)}")
+                    raise
 
-        return embeddings
+        await asyncio.gather(*[embed(i, batch) for i, batch in enumerate(batches)])
+
+        return [embedding for batch_embeddings in results for embedding in batch_embeddings]
+
+_clients_lock = threading.Lock()
+_search_clients: Dict[Tuple[str, str, str], SearchClient] = {}
 
 class SearchInfo:
     def __init__(self, endpoint: str, credential: str, index_name: str):
         self.endpoint = endpoint
+        self.api_key = credential
         self.credential = AzureKeyCredential(credential)
         self.index_name = index_name
 
     def create_search_client(self):
-        return SearchClient(
-            endpoint=self.endpoint,
-            index_name=self.index_name,
-            credential=self.credential
-        )
-
-def sourcepage_from_file_page(filename: str, page: int = 0) -> str:
-    """Generate sourcepage string for a given file and page number"""
-    if os.path.splitext(filename)[1].lower() == ".pdf":
-        return f"{os.path.basename(filename)}#page={page+1}"
-    else:
-        return os.path.basename(filename)
-
-async def get_blob_content(blob_url: str) -> Tuple[bytes, str, str]:
-    """Get blob content and metadata from URL"""
+        # Reuse one client per index so warm workers skip the TLS handshake;
+        # the admin key is part of the cache key so a rotated key gets a fresh client
+        key = (self.endpoint, self.index_name, self.api_key)
+        with _clients_lock:
+            if key not in _search_clients:
+                _search_clients[key] = SearchClient(
+                    endpoint=self.endpoint,
+                    index_name=self.index_name,
+                    credential=self.credential
+                )
+            return _search_clients[key]
+
+_embeddings_service: Optional[OpenAIEmbeddings] = None
+
+def get_embeddings_service() -> OpenAIEmbeddings:
+    """Return the embeddings service, reusing its client across invocations"""
+    global _embeddings_service
+    with _clients_lock:
+        if _embeddings_service is None:
+            _embeddings_service = OpenAIEmbeddings(
+                endpoint=os.environ["AZURE_OPENAI_ENDPOINT"],
+                deployment=os.environ["AZURE_OPENAI_DEPLOYMENT"],
+                api_key=os.environ["AZURE_OPENAI_KEY"]
+            )
+        return _embeddings_service
+
+async def upload_documents(search_client: SearchClient, documents: List[Dict],
+                           max_concurrency: int = 4, max_attempts: int = 3) -> int:
+    """Upload documents in concurrent batches, retrying only the documents that failed"""
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def upload_batch(batch: List[Dict]) -> int:
+        async with semaphore:
+            for attempt in range(1, max_attempts + 1):
+                results = await search_client.upload_documents(documents=batch)
+                failed_keys = {result.key for result in results if not result.succeeded}
+                if not failed_keys:
+                    return len(results)
+
+                batch = [document for document in batch if document["id"] in failed_keys]
+                logger.warning(f"{len(batch)} documents failed to index (attempt {attempt} of {max_attempts})")
+                if attempt < max_attempts:
+                    await asyncio.sleep(2 ** attempt)
+
+            raise AzureError(f"Failed to index {len(batch)} documents after {max_attempts} attempts")
+
+    batches = [documents[i:i + UPLOAD_BATCH_SIZE] for i in range(0, len(documents), UPLOAD_BATCH_SIZE)]
+    uploaded = await asyncio.gather(*[upload_batch(batch) for batch in batches])
+    return sum(uploaded)
+
+async def get_blob_content(blob_url: str) -> Tuple[StorageStreamDownloader, str, str]:
+    """Open a download stream for the blob and get its metadata from URL"""
     try:
         logger.info(f"Getting blob content from URL: {blob_url}")
         
-        url_path = blob_url.replace("https://", "")
-        parts = url_path.split('/')
-        
-        if len(parts) < 2:
-            raise ValueError(f"Invalid blob URL format: {blob_url}")
-            
-        account = parts[0].split('.')[0]
-        
-        container_name = None
-        blob_name = None
-        
-        for i, part in enumerate(parts):
-            if part == "evidencefiles":
-                container_name = part
-                blob_name = '/'.join(parts[i+1:])
-                break
+        parsed_url = urlparse(blob_url)
+        account = parsed_url.netloc.split('.')[0]
+        container_name, _, blob_name = parsed_url.path.lstrip('/').partition('/')
         
         if not container_name or not blob_name:
             raise ValueError(f"Could not find container or blob name in URL: {blob_url}")
+        
+        if container_name not in INDEXED_CONTAINERS:
+            raise ValueError(f"Container {container_name} is not indexed: {blob_url}")
             
         logger.info(f"Parsed URL - Account: {account}, Container: {container_name}, Blob: {blob_name}")
         
         # Get blob content
-        connection_string = os.environ["AzureWebJobsStorage"]
-        blob_service_client = BlobServiceClient.from_connection_string(connection_string)
+        blob_service_client = get_blob_service_client()
         container_client = blob_service_client.get_container_client(container_name)
         blob_client = container_client.get_blob_client(blob_name)
         
         # Download content
         try:
-            download_stream = blob_client.download_blob()
-            content = download_stream.readall()
+            download_stream = blob_client.download_blob(max_concurrency=8)
             content_type = download_stream.properties.content_settings.content_type or 'application/octet-stream'
             
-            logger.info(f"Successfully downloaded blob - Size: {len(content)} bytes, Type: {content_type}")
+            logger.info(f"Opened blob download - Size: {download_stream.size} bytes, Type: {content_type}")
             
-            return content, content_type, blob_name
+            return download_stream, content_type, blob_name
             
         except Exception as download_error:
             logger.error(f"Error downloading blob content: {str(download_error)}")
@@ -240,97 +469,164 @@ async def get_blob_content(blob_url: str) -> Tuple[bytes, str, str]:
         logger.error(f"Traceback: {traceback.format_exc()}")
         raise
 
-async def process_file_and_update_index(blob_content: bytes, content_type: str, file_name: str, search_info: SearchInfo) -> None:
+async def process_file_and_update_index(blob_stream: StorageStreamDownloader, content_type: str, file_name: str, search_info: SearchInfo) -> None:
     """Process file content and update search index"""
     try:
         logger.info(f"Starting to process file: {file_name}")
         
-        if not blob_content or len(blob_content) == 0:
+        if not blob_stream.size:
             logger.warning(f"Empty file content for {file_name}")
             return
         
         file = File(
             filename=file_name,
-            content=blob_content,
-            content_type=content_type
+            content_type=content_type,
+            stream=blob_stream
         )
 
-        text_splitter = TextSplitter()
-        
-        # Extract and split text
-        try:
-            text = await text_splitter.extract_text(file)
-            if not text:
-                logger.warning(f"No text content extracted from {file_name}")
-                return
-                
-            split_pages = text_splitter.split_text(text)
-            logger.info(f"Successfully split {file_name} into {len(split_pages)} pages")
-            
-        except Exception as e:
-            logger.error(f"Error extracting text from {file_name}: {str(e)}")
-            raise
+        # Values shared by every section of this file, computed once
+        file_id = file.filename_to_id()
+        file_basename = os.path.basename(file_name)
+        is_pdf = file_name.lower().endswith('.pdf')
+        storage_url = f"https://{os.environ['AZURE_STORAGE_ACCOUNT_NAME']}.blob.core.windows.net/{blob_stream.container}/{file_name}"
 
-        # Create sections
-        sections = [
-            Section(
-                split_page=split_page,
-                content=file,
-                category=None,
-                title=os.path.basename(file_name),
-                urls=[]
-            )
-            for split_page in split_pages
-        ]
-        
-        logger.info(f"Created {len(sections)} sections")
+        text_splitter = TextSplitter()
+        split_pages = text_splitter.split_pages(text_splitter.iter_text(file))
 
         # Initialize embeddings service
-        embeddings_service = OpenAIEmbeddings(
-            endpoint=os.environ["AZURE_OPENAI_ENDPOINT"],
-            deployment=os.environ["AZURE_OPENAI_DEPLOYMENT"],
-            api_key=os.environ["AZURE_OPENAI_KEY"]
-        )
-
-        # Create embeddings
-        texts = [section.split_page.text for section in sections]
-        try:
-            embeddings = await embeddings_service.create_embeddings(texts)
-            logger.info(f"Created {len(embeddings)} embeddings")
-        except Exception as e:
-            logger.error(f"Error creating embeddings: {str(e)}")
-            raise
+        embeddings_service = get_embeddings_service()
+        window_size = embeddings_service.batch_size * embeddings_service.max_concurrency
 
-        # Create search client and upload documents
         search_client = search_info.create_search_client()
-        
-        # Structure documents with embeddings
-        documents = [
-            {
-                "id": f"{section.content.filename_to_id()}-page-{i}",
-                "content": section.split_page.text,
-                "embedding": embedding,
-                "title": section.title,
-                "category": section.category,
-                "sourcefile": section.content.filename(),
-                "sourcepage": sourcepage_from_file_page(
-                    filename=section.content.filename(),
-                    page=section.split_page.page_num
-                ),
-                "urls": section.urls,
-                "storageUrl": f"https://{os.environ['AZURE_STORAGE_ACCOUNT_NAME']}.blob.core.windows.net/evidencefiles/{file_name}"
-            }
-            for i, (section, embedding) in enumerate(zip(sections, embeddings))
-        ]
-        
-        # Upload documents
+
+        # Embedded sections flow from the producer to the uploader through a bounded queue,
+        # so indexing overlaps with reading and embedding the rest of the file
+        queue: asyncio.Queue = asyncio.Queue(maxsize=16)
+        upload_semaphore = asyncio.Semaphore(4)
+        # Bound the windows waiting on embeddings, so the reader pauses when embedding falls
+        # behind instead of holding every section of a large file in pending tasks
+        window_slots = asyncio.Semaphore(embeddings_service.max_concurrency)
+
+        async def embed(window: List[Section]) -> None:
+            try:
+                texts = [section.split_page.text for section in window]
+                token_counts = [section.split_page.token_count for section in window]
+                try:
+                    embeddings = await embeddings_service.create_embeddings(texts, token_counts)
+                except Exception as e:
+                    logger.error(f"Error creating embeddings: {str(e)}")
+                    raise
+                for section, embedding in zip(window, embeddings):
+                    await queue.put((section, embedding))
+            finally:
+                window_slots.release()
+
+        async def produce() -> int:
+            section_count = 0
+            embedding_tasks = []
+            window: List[Section] = []
+            try:
+                # Download and split on a worker thread, sending each full window of sections
+                # to the embeddings service while the rest of the file is still being read
+                while True:
+                    try:
+                        split_page = await asyncio.to_thread(next, split_pages, None)
+                    except Exception as e:
+                        logger.error(f"Error extracting text from {file_name}: {str(e)}")
+                        raise
+                    if split_page is not None:
+                        window.append(Section(
+                            split_page=split_page,
+                            content=file,
+                            category=None,
+                            title=file_basename,
+                            urls=[]
+                        ))
+                    if window and (split_page is None or len(window) >= window_size):
+                        await window_slots.acquire()
+                        # Drop finished windows, surfacing a failed one now rather than
+                        # after the rest of the file has been read
+                        finished = [task for task in embedding_tasks if task.done()]
+                        embedding_tasks = [task for task in embedding_tasks if not task.done()]
+                        for task in finished:
+                            task.result()
+                        embedding_tasks.append(asyncio.create_task(embed(window)))
+                        section_count += len(window)
+                        window = []
+                    if split_page is None:
+                        break
+                await asyncio.gather(*embedding_tasks)
+            except BaseException:
+                for task in embedding_tasks:
+                    task.cancel()
+                # Retrieve their outcomes so failures are not reported as never retrieved
+                await asyncio.gather(*embedding_tasks, return_exceptions=True)
+                raise
+            # On failure the consumer is cancelled instead of being sent the end marker
+            await queue.put(None)
+            return section_count
+
+        async def upload(documents: List[Dict]) -> int:
+            async with upload_semaphore:
+                try:
+                    return await upload_documents(search_client, documents)
+                except Exception as upload_error:
+                    logger.error(f"Error uploading to search index: {str(upload_error)}")
+                    raise
+
+        async def consume() -> int:
+            upload_tasks = []
+            documents = []
+            try:
+                while True:
+                    item = await queue.get()
+                    if item is None:
+                        break
+                    section, embedding = item
+                    page_num = section.split_page.page_num
+                    # Structure documents with embeddings
+                    documents.append({
+                        "id": f"{file_id}-page-{page_num}",
+                        "content": section.split_page.text,
+                        "embedding": embedding,
+                        "title": section.title,
+                        "category": section.category,
+                        "sourcefile": file_name,
+                        "sourcepage": f"{file_basename}#page={page_num+1}" if is_pdf else file_basename,
+                        "urls": section.urls,
+                        "storageUrl": storage_url
+                    })
+                    if len(documents) >= UPLOAD_BATCH_SIZE:
+                        upload_tasks.append(asyncio.create_task(upload(documents)))
+                        documents = []
+                if documents:
+                    upload_tasks.append(asyncio.create_task(upload(documents)))
+                return sum(await asyncio.gather(*upload_tasks))
+            except BaseException:
+                # Stop uploads already in flight so a failed file is not left partly indexed
+                for task in upload_tasks:
+                    task.cancel()
+                await asyncio.gather(*upload_tasks, return_exceptions=True)
+                raise
+
+        producer = asyncio.create_task(produce())
+        consumer = asyncio.create_task(consume())
         try:
-            result = search_client.upload_documents(documents)
-            logger.info(f"Uploaded {len(result)} documents to search index")
-        except Exception as upload_error:
-            logger.error(f"Error uploading to search index: {str(upload_error)}")
+            section_count, uploaded = await asyncio.gather(producer, consumer)
+        except BaseException:
+            producer.cancel()
+            consumer.cancel()
+            # Wait for both to finish cancelling their in-flight embedding and upload tasks
+            await asyncio.gather(producer, consumer, return_exceptions=True)
             raise
 
+        if not section_count:
+            logger.warning(f"No text content extracted from {file_name}")
+            return
+
+        logger.info(f"Created and embedded {section_count} sections")
+        logger.info(f"Uploaded {uploaded} documents to search index")
+
     except Exception as e:
         logger.error(f"Error processing file {file_name}: {str(e)}")
         logger.error(f"Traceback: {traceback.format_exc()}")
@@ -362,10 +658,10 @@ async def main(event: func.EventGridEvent) -> None:
 
         # Get blob content
         try:
-            blob_content, content_type, file_name = await get_blob_content(blob_url)
+            blob_stream, content_type, file_name = await get_blob_content(blob_url)
             content_type = event_content_type or content_type
             
-            if not blob_content or len(blob_content) == 0:
+            if not blob_stream.size:
                 logger.warning(f'Empty content received for file: {file_name}')
                 return
                 
@@ -374,7 +670,7 @@ async def main(event: func.EventGridEvent) -> None:
             return
 
         logger.info(f"Processing file: {file_name}")
-        logger.info(f"File details - Size: {len(blob_content)}, Type: {content_type}")
+        logger.info(f"File details - Size: {blob_stream.size}, Type: {content_type}")
 
         # Initialize search configuration
         search_info = SearchInfo(
@@ -385,7 +681,7 @@ async def main(event: func.EventGridEvent) -> None:
 
         # Process file
         await process_file_and_update_index(
-            blob_content=blob_content,
+            blob_stream=blob_stream,
             content_type=content_type,
             file_name=file_name,
             search_info=search_info
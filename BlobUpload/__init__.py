@@ -1,9 +1,8 @@
 import logging
 import azure.functions as func
-from azure.storage.blob import BlobServiceClient
-import os
 from datetime import datetime
 import json
+from shared_code.blob_storage import get_blob_service_client, get_container_client
 
 def validate_request(req: func.HttpRequest) -> tuple[bool, str]:
     """Validate the request parameters"""
@@ -48,11 +47,8 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
         # Get the file content
         file_content = req.get_body()
         
-        # Get connection string from environment variable
-        connect_str = os.environ['AzureWebJobsStorage']
-        
-        # Create the BlobServiceClient
-        blob_service_client = BlobServiceClient.from_connection_string(connect_str)
+        # Get the shared BlobServiceClient
+        blob_service_client = get_blob_service_client()
         
         # Get container name - default to 'evidencefiles' if not specified in outputPath
         container_name = "evidencefiles"
@@ -73,19 +69,13 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
                     blob_path = file_name
 
         # Get container client
-        container_client = blob_service_client.get_container_client(container_name)
-        
-        # Create container if it doesn't exist
-        try:
-            container_client.get_container_properties()
-        except Exception:
-            container_client = blob_service_client.create_container(container_name)
+        container_client = get_container_client(blob_service_client, container_name)
         
         # Create blob client
         blob_client = container_client.get_blob_client(blob_path)
         
         # Upload the file
-        blob_client.upload_blob(file_content, overwrite=True)
+        blob_client.upload_blob(file_content, length=len(file_content), overwrite=True, max_concurrency=8)
         
         # Construct full path for response
         full_path = f"{container_name}/{blob_path}"
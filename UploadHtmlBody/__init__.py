@@ -1,10 +1,11 @@
 import logging
 import azure.functions as func
-from azure.storage.blob import BlobServiceClient, ContentSettings
-from azure.core.exceptions import ResourceExistsError
-import os
+from azure.storage.blob import ContentSettings
 from urllib.parse import unquote
 import json
+from shared_code.blob_storage import get_blob_service_client, get_container_client
+
+URL_SCHEMES = ('https://', 'http://')
 
 def extract_filename_from_url(url: str) -> str:
     """Remove https:// and replace slashes with underscores"""
@@ -12,10 +13,14 @@ def extract_filename_from_url(url: str) -> str:
     url = url.rstrip('/')
     
     # Remove https:// or http:// from the URL
-    if url.startswith('https://'):
-        url = url[8:]  # Remove 'https://'
-    elif url.startswith('http://'):
-        url = url[7:]  # Remove 'http://'
+    for scheme in URL_SCHEMES:
+        if url.startswith(scheme):
+            url = url[len(scheme):]
+            break
+    
+    # Replace encoded characters in URL if any (like %2C) with their actual characters,
+    # before replacing slashes so encoded slashes (%2F) also become underscores
+    url = unquote(url)
     
     # Replace slashes with underscores
     url = url.replace('/', '_')
@@ -23,9 +28,6 @@ def extract_filename_from_url(url: str) -> str:
     # Ensure the URL ends with .html
     if not url.endswith('.html'):
         url = url + '.html'
-    
-    # Replace encoded characters in URL if any (like %2C) with their actual characters
-    url = unquote(url)
         
     return url
 
@@ -49,21 +51,12 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
         original_url = url  # Keep original URL for metadata
         logging.info(f'Extracted filename: {filename}')
         
-        # Get connection string from environment variable
-        connect_str = os.environ['AzureWebJobsStorage']
-        
-        # Create the BlobServiceClient
-        blob_service_client = BlobServiceClient.from_connection_string(connect_str)
+        # Get the shared BlobServiceClient
+        blob_service_client = get_blob_service_client()
         
         # Get container client
         container_name = "htmlcontent"
-        container_client = blob_service_client.get_container_client(container_name)
-        
-        # Create container if it doesn't exist
-        try:
-            container_client.get_container_properties()
-        except Exception:
-            container_client = blob_service_client.create_container(container_name)
+        container_client = get_container_client(blob_service_client, container_name)
 
         # Create blob client
         blob_client = container_client.get_blob_client(filename)
@@ -74,9 +67,12 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
             content_disposition=f'inline; filename="{filename}"'
         )
         
+        data = body.encode('utf-8')
         blob_client.upload_blob(
-            data=body,
+            data=data,
+            length=len(data),
             overwrite=True,
+            max_concurrency=8,
             content_settings=content_settings,
             metadata={'original_url': original_url}
         )
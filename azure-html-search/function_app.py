@@ -1,16 +1,32 @@
 import azure.functions as func
+import asyncio
 import logging
-import json
+import orjson
 from azure.core.credentials import AzureKeyCredential
-from azure.search.documents import SearchClient
+from azure.search.documents.aio import SearchClient
 from typing import Optional, List, Union, Dict
 import os
 from dataclasses import dataclass
+from functools import lru_cache
+from urllib.parse import unquote
 import re
 
 # Initialize the function app
 app = func.FunctionApp(http_auth_level=func.AuthLevel.ANONYMOUS)
 
+# HTML tag pattern used per search result, compiled once
+_HTML_TAG_RE = re.compile(r'<[^>]+>')
+
+# Number of secondary (PDF) index hits checked against the linked PDFs of each request
+SECONDARY_MAX_RESULTS = 50
+
+# Common policy PDFs linked from every page, never relevant to a search
+EXCLUDED_PDFS = [
+    "Whistleblower_Rights_Employees_OGC",
+    "Whistleblower_Rights_and_Remedies_Contractors_Grantees_OGC"
+]
+_EXCLUDED_PDF_RE = re.compile('|'.join(map(re.escape, EXCLUDED_PDFS)))
+
 @dataclass
 class SearchRequest:
     search_text: str
@@ -42,36 +58,43 @@ def get_search_context(text: str, search_text: str, context_chars: int = 150) ->
         str: The context snippet with the search term and surrounding text
     """
     if not text or not search_text:
-        logging.info(f"Empty text or search_text: text='{text}', search_text='{search_text}'")
+        logging.debug("Empty text or search_text: text=%r, search_text=%r", text, search_text)
         return ""
     
     # Convert to string and clean HTML
     text_str = str(text) if text is not None else ""
     # Remove HTML tags using simple regex
-    clean_text = re.sub(r'<[^>]+>', ' ', text_str)
+    clean_text = _HTML_TAG_RE.sub(' ', text_str)
     # Remove extra whitespace
     clean_text = ' '.join(clean_text.split())
     
     # Log the cleaned text for debugging
-    logging.info(f"Cleaned text length: {len(clean_text)}")
-    logging.info(f"First 100 chars of cleaned text: {clean_text[:100]}")
+    logging.debug("Cleaned text length: %d", len(clean_text))
     
     # Find the position of the search term (case insensitive)
     search_text_lower = search_text.lower()
     text_lower = clean_text.lower()
+    if len(text_lower) == len(clean_text):
+        find = text_lower.find
+    else:
+        # Lowercasing changed the length (e.g. 'İ'), so offsets into text_lower
+        # would not line up with clean_text; search the original text instead
+        def find(needle: str) -> int:
+            match = re.search(re.escape(needle), clean_text, re.IGNORECASE)
+            return match.start() if match else -1
     
-    position = text_lower.find(search_text_lower)
+    position = find(search_text_lower)
     if position == -1:
         # Try finding partial matches
         words = search_text_lower.split()
         for word in words:
             if len(word) > 3:  # Only search for words longer than 3 characters
-                position = text_lower.find(word)
+                position = find(word)
                 if position != -1:
                     break
                 
     if position == -1:
-        logging.info(f"No match found for search_text: '{search_text}' in content")
+        logging.debug("No match found for search_text: %r in content", search_text)
         return ""
         
     # Calculate the context window
@@ -87,7 +110,7 @@ def get_search_context(text: str, search_text: str, context_chars: int = 150) ->
     if end < len(clean_text):
         snippet = f"{snippet}..."
     
-    logging.info(f"Found context snippet: {snippet}")
+    logging.debug("Found context snippet: %s", snippet)
     return snippet
 
 def get_first_url(embedded_urls: Union[str, List[str], None]) -> Optional[str]:
@@ -101,100 +124,122 @@ def get_first_url(embedded_urls: Union[str, List[str], None]) -> Optional[str]:
         return urls[0] if urls else None
     return None
 
-def ensure_list(value: Union[List[str], str, None]) -> Optional[List[str]]:
-    if value is None:
-        return None
-    if isinstance(value, str):
-        return [value]
-    return value
-
 def has_filters(search_request: SearchRequest) -> bool:
     """Check if any filters are present in the search request."""
-    return any([
-        search_request.programs,
-        search_request.ages_studied,
-        search_request.focus_population,
-        search_request.domain,
-        search_request.subdomain_1,  # Added subdomain checks
-        search_request.subdomain_2,
-        search_request.subdomain_3
-    ])
+    return bool(
+        search_request.programs
+        or search_request.ages_studied
+        or search_request.focus_population
+        or search_request.domain
+        or search_request.subdomain_1  # Added subdomain checks
+        or search_request.subdomain_2
+        or search_request.subdomain_3
+    )
+
+def odata_literal(value: str) -> str:
+    """Quote a value as an OData string literal, doubling embedded single quotes."""
+    return "'" + str(value).replace("'", "''") + "'"
+
+def search_in(field: str, values: List[str]) -> str:
+    """
+    Build a search.in() clause matching any of values.
+    Uses '|' as the delimiter since values may contain commas or spaces.
+    """
+    values = [str(value) for value in values]
+    if any('|' in value for value in values):
+        # search.in cannot escape its delimiter, so fall back to equality clauses
+        return "(" + " or ".join(f"{field} eq {odata_literal(value)}" for value in values) + ")"
+    return f"search.in({field}, {odata_literal('|'.join(values))}, '|')"
 
 def build_filter_string(search_request: SearchRequest) -> Optional[str]:
     filters = []
     
-    if search_request.programs:
-        programs = ensure_list(search_request.programs)
-        programs_filter = " or ".join(f"programs/any(p: p eq '{prog}')" for prog in programs)
+    programs = search_request.programs
+    if programs:
+        # A single value is the common case and needs no list or search.in
+        if isinstance(programs, str):
+            programs_filter = f"programs/any(p: p eq {odata_literal(programs)})"
+        else:
+            programs_filter = f"programs/any(p: {search_in('p', programs)})"
         filters.append(f"({programs_filter})")
-        logging.info(f"Programs filter: {programs_filter}")
+        logging.debug("Programs filter: %s", programs_filter)
         
-    if search_request.ages_studied:
-        ages = ensure_list(search_request.ages_studied)
-        ages_filter = " or ".join(f"ages_studied/any(a: a eq '{age}')" for age in ages)
+    ages = search_request.ages_studied
+    if ages:
+        if isinstance(ages, str):
+            ages_filter = f"ages_studied/any(a: a eq {odata_literal(ages)})"
+        else:
+            ages_filter = f"ages_studied/any(a: {search_in('a', ages)})"
         filters.append(f"({ages_filter})")
-        logging.info(f"Ages filter: {ages_filter}")
+        logging.debug("Ages filter: %s", ages_filter)
     
     if search_request.focus_population:
-        population_filter = f"focus_population/any(f: f eq '{search_request.focus_population}')"
+        population_filter = f"focus_population/any(f: f eq {odata_literal(search_request.focus_population)})"
         filters.append(f"({population_filter})")
-        logging.info(f"Focus population filter: {population_filter}")
+        logging.debug("Focus population filter: %s", population_filter)
     
     if search_request.domain:
-        filters.append(f"domain eq '{search_request.domain}'")
-        logging.info(f"Domain filter: domain eq '{search_request.domain}'")
+        domain_filter = f"domain eq {odata_literal(search_request.domain)}"
+        filters.append(domain_filter)
+        logging.debug("Domain filter: %s", domain_filter)
     
     # Add subdomain filters
     if search_request.subdomain_1:
-        filters.append(f"subdomain_1 eq '{search_request.subdomain_1}'")
-        logging.info(f"Subdomain 1 filter: subdomain_1 eq '{search_request.subdomain_1}'")
+        subdomain_filter = f"subdomain_1 eq {odata_literal(search_request.subdomain_1)}"
+        filters.append(subdomain_filter)
+        logging.debug("Subdomain 1 filter: %s", subdomain_filter)
     
     if search_request.subdomain_2:
-        filters.append(f"subdomain_2 eq '{search_request.subdomain_2}'")
-        logging.info(f"Subdomain 2 filter: subdomain_2 eq '{search_request.subdomain_2}'")
+        subdomain_filter = f"subdomain_2 eq {odata_literal(search_request.subdomain_2)}"
+        filters.append(subdomain_filter)
+        logging.debug("Subdomain 2 filter: %s", subdomain_filter)
     
     if search_request.subdomain_3:
-        filters.append(f"subdomain_3 eq '{search_request.subdomain_3}'")
-        logging.info(f"Subdomain 3 filter: subdomain_3 eq '{search_request.subdomain_3}'")
+        subdomain_filter = f"subdomain_3 eq {odata_literal(search_request.subdomain_3)}"
+        filters.append(subdomain_filter)
+        logging.debug("Subdomain 3 filter: %s", subdomain_filter)
     
     final_filter = " and ".join(filters) if filters else None
-    logging.info(f"Final filter string: {final_filter}")
+    logging.info("Final filter string: %s", final_filter)
     return final_filter
 
-def extract_pdf_filename(pdf_url: str) -> str:
+@lru_cache(maxsize=None)
+def get_search_client(endpoint: str, index_name: str, key: str) -> SearchClient:
     """
-    Extract filename from PDF URL.
-    Example: https://americorps.gov/sites/default/files/evidenceexchange/MinnesotaAllianceWithYouth.20AC220660.Report-Revised_508_1.pdf
-    Returns: MinnesotaAllianceWithYouth.20AC220660.Report-Revised_508_1.pdf
+    Return a SearchClient shared across invocations, so its HTTP pipeline
+    and connection pool are reused by the warm worker process.
     """
-    try:
-        return pdf_url.split('/')[-1]
-    except:
-        return ""
+    return SearchClient(endpoint=endpoint, index_name=index_name, credential=AzureKeyCredential(key))
 
-def search_single_index(
+def is_evidence_exchange(result: Dict) -> bool:
+    """Check if a primary result links to evidence-exchange PDFs."""
+    return ((result.get('domain') or '').lower() == "evidence-exchange" or
+            (result.get('resource_type') or '').lower() == "evidence-exchange")
+
+async def search_single_index(
     search_text: str,
     search_client: SearchClient,
     index_name: str,
-    max_results: int = 100
+    max_results: int = 100,
+    filter_string: Optional[str] = None
 ) -> List[Dict]:
     """
     Search content field in index and return results.
     """
     try:
-        logging.info(f"Searching content field in index '{index_name}' for: {search_text}")
+        logging.info("Searching content field in index '%s' for: %s", index_name, search_text)
 
-        response = list(search_client.search(
-            search_text=f"content:{search_text}",
+        response = await search_client.search(
+            search_text=search_text,
+            search_fields=["content"],
+            filter=filter_string,
             select=["content", "title", "sourcepage", "sourcefile", "storageUrl"],
-            query_type="full",
+            query_type="simple",
             top=max_results
-        ))
-        
-        logging.info(f"Found {len(response)} results")
+        )
 
         results = []
-        for result in response:
+        async for result in response:
             content = get_search_context(result.get("content", ""), search_text)
             
             result_dict = {
@@ -206,92 +251,53 @@ def search_single_index(
             }
             results.append(result_dict)
 
+        logging.info("Found %d results", len(results))
         return results
     except Exception as e:
         logging.error(f"Search error: {str(e)}", exc_info=True)
         return []
 
-def extract_pdf_stem(pdf_url: str) -> str:
+def extract_pdf_filename(pdf_url: str) -> str:
     """
-    Extract filename without extension from PDF URL, handling URL encoding.
+    Extract filename from PDF URL, handling URL encoding.
+    Example: https://americorps.gov/sites/default/files/evidenceexchange/MinnesotaAllianceWithYouth.20AC220660.Report-Revised_508_1.pdf
+    Returns: MinnesotaAllianceWithYouth.20AC220660.Report-Revised_508_1.pdf
     """
     try:
-        from urllib.parse import unquote
         # Get the filename from the URL
-        filename = pdf_url.split('/')[-1]
-        # URL decode the filename
-        decoded_filename = unquote(filename)
-        # Remove the extension
-        stem = decoded_filename.rsplit('.', 1)[0]
-        logging.info(f"Extracted PDF stem: {stem} from URL: {pdf_url}")
-        return stem
+        filename = pdf_url.rpartition('/')[2]
+        # URL decode the filename; most URLs have nothing to decode
+        decoded_filename = unquote(filename) if '%' in filename else filename
+        logging.debug("Extracted filename: %s from URL: %s", decoded_filename, pdf_url)
+        return decoded_filename
     except Exception as e:
-        logging.error(f"Error extracting PDF stem from URL {pdf_url}: {str(e)}")
+        logging.error(f"Error extracting filename from URL {pdf_url}: {str(e)}")
         return ""
 
-def normalize_string(s: str) -> str:
-    """
-    Normalize string by removing special characters and extra spaces.
-    """
-    import re
-    # Replace special characters with spaces
-    s = re.sub(r'[^a-zA-Z0-9\s]', ' ', s)
-    # Replace multiple spaces with single space
-    s = re.sub(r'\s+', ' ', s)
-    # Strip and lowercase
-    return s.strip().lower()
-
-def check_pdf_in_titles(pdf_stem: str, titles: list) -> bool:
-    """
-    Check if PDF stem matches any title, using normalized comparison.
-    """
-    if not pdf_stem:
-        return False
-        
-    normalized_pdf = normalize_string(pdf_stem)
-    logging.info(f"Normalized PDF stem: {normalized_pdf}")
-    
-    for title in titles:
-        normalized_title = normalize_string(title)
-        logging.info(f"Checking against normalized title: {normalized_title}")
-        if normalized_pdf == normalized_title:
-            logging.info(f"Found match between '{pdf_stem}' and '{title}'")
-            return True
-    return False
-
 def filter_pdf_urls(pdf_urls: List[str]) -> List[str]:
     """Filter out common policy PDFs and return only relevant ones."""
     if not pdf_urls:
         return []
-        
-    excluded_pdfs = [
-        "Whistleblower_Rights_Employees_OGC",
-        "Whistleblower_Rights_and_Remedies_Contractors_Grantees_OGC"
-    ]
     
     return [
         url for url in pdf_urls 
-        if not any(excluded in url for excluded in excluded_pdfs)
+        if not _EXCLUDED_PDF_RE.search(url)
     ]
 
-def extract_pdf_filename(pdf_url: str) -> str:
+def build_results_body(result_fragments: List[bytes], response_data: Dict) -> bytes:
     """
-    Extract filename without extension from PDF URL, handling URL encoding.
+    Assemble {"results": [...], **response_data} from already-serialized results,
+    so each result is encoded once and no full response dict is built.
     """
-    try:
-        from urllib.parse import unquote
-        # Get the filename from the URL
-        filename = pdf_url.split('/')[-1]
-        # URL decode the filename and remove extension
-        decoded_filename = unquote(filename).rsplit('.', 1)[0]
-        logging.info(f"Extracted filename: {decoded_filename} from URL: {pdf_url}")
-        return decoded_filename
-    except Exception as e:
-        logging.error(f"Error extracting filename from URL {pdf_url}: {str(e)}")
-        return ""
+    return b''.join((
+        b'{"results":[',
+        b','.join(result_fragments),
+        b'],' if response_data else b']',
+        orjson.dumps(response_data)[1:]
+    ))
 
 @app.route(route="search")
-def search_function(req: func.HttpRequest) -> func.HttpResponse:
+async def search_function(req: func.HttpRequest) -> func.HttpResponse:
     try:
         logging.info("Received search request")
         request_body = req.get_json()
@@ -314,9 +320,8 @@ def search_function(req: func.HttpRequest) -> func.HttpResponse:
         primary_index_name = os.environ["SEARCH_INDEX_NAME"]
         secondary_index_name = os.environ.get("SECONDARY_SEARCH_INDEX_NAME", "pdf-html")
 
-        credential = AzureKeyCredential(key)
-        primary_client = SearchClient(endpoint=endpoint, index_name=primary_index_name, credential=credential)
-        secondary_client = SearchClient(endpoint=endpoint, index_name=secondary_index_name, credential=credential)
+        primary_client = get_search_client(endpoint, primary_index_name, key)
+        secondary_client = get_search_client(endpoint, secondary_index_name, key)
 
         # Build filter string
         filter_string = build_filter_string(search_request)
@@ -337,7 +342,7 @@ def search_function(req: func.HttpRequest) -> func.HttpResponse:
 
         # If no search text, just return the count
         if not search_text:
-            results = primary_client.search(
+            results = await primary_client.search(
                 search_text="*",
                 filter=filter_string,
                 select=["id"],
@@ -345,10 +350,10 @@ def search_function(req: func.HttpRequest) -> func.HttpResponse:
                 include_total_count=True
             )
             
-            total_count = results.get_count() if hasattr(results, 'get_count') else sum(1 for _ in results)
+            total_count = await results.get_count()
             
             return func.HttpResponse(
-                json.dumps({
+                orjson.dumps({
                     "total_count": total_count,
                     "applied_filters": {
                         "programs": search_request.programs,
@@ -364,85 +369,115 @@ def search_function(req: func.HttpRequest) -> func.HttpResponse:
                 status_code=200
             )
         
-        # Execute primary search with search text
-        primary_results = list(primary_client.search(
-            search_text=search_text,
-            filter=filter_string,
-            select=select_fields,
-            top=100,
-            include_total_count=True
+        # The secondary query does not depend on the primary results, so start it now
+        # and let it run while the primary results are streamed and processed
+        secondary_task = asyncio.create_task(search_single_index(
+            search_text,
+            secondary_client,
+            secondary_index_name,
+            max_results=SECONDARY_MAX_RESULTS
         ))
+        try:
+            # Execute primary search with search text; results are streamed page by page
+            primary_results = await primary_client.search(
+                search_text=search_text,
+                filter=filter_string,
+                select=select_fields,
+                top=100,
+                include_total_count=True
+            )
         
-        total_count = primary_results.get_count() if hasattr(primary_results, 'get_count') else len(primary_results)
+            total_count = await primary_results.get_count()
         
-        # Process results
-        search_results = []
-        for result in primary_results:
-            try:
-                filtered_result = {
-                    'content': get_search_context(result.get('content', ''), search_text),
-                    'url': get_first_url(result.get('embedded_urls')),
-                    'title': result.get('title', ''),
-                    'programs': result.get('programs', []),
-                    'ages_studied': result.get('ages_studied', []),
-                    'focus_population': result.get('focus_population', []),
-                    'domain': result.get('domain', ''),
-                    'subdomain_1': result.get('subdomain_1', ''),
-                    'subdomain_2': result.get('subdomain_2', ''),
-                    'subdomain_3': result.get('subdomain_3', ''),
-                    'resource_type': result.get('resource_type', ''),
-                    'pdf_urls': filter_pdf_urls(result.get('pdf_urls', [])),
-                    'found_in_pdf': False
-                }
-
-                # Only check PDFs if domain or resource_type is "evidence-exchange"
-                domain = result.get('domain', '').lower()
-                resource_type = result.get('resource_type', '').lower()
-                
-                if domain == "evidence-exchange" or resource_type == "evidence-exchange":
-                    # Get secondary results once for each primary result
-                    secondary_results = search_single_index(
-                        search_text,
-                        secondary_client,
-                        secondary_index_name,
-                        max_results=5
-                    )
-                    
-                    # Check all PDFs against the secondary results
-                    for pdf_url in filtered_result['pdf_urls']:
-                        if not pdf_url:
-                            continue
-
-                        pdf_filename = extract_pdf_filename(pdf_url)
-                        if not pdf_filename:
-                            continue
-
-                        logging.info(f"Checking PDF: {pdf_filename}")
-                        
-                        # Look for matches in secondary results
-                        for sec_result in secondary_results:
-                            if pdf_filename and sec_result.get('content', ''):
-                                # Check if search text is in the PDF content
-                                if search_text.lower() in sec_result['content'].lower():
-                                    filtered_result['found_in_pdf'] = True
-                                    filtered_result['pdf_content'] = sec_result.get('content', '')
-                                    logging.info(f"Found search text in PDF content for {pdf_filename}")
-                                    break
-                        
-                        if filtered_result['found_in_pdf']:
-                            break
-
-                if (filtered_result['content'] or 
-                    filtered_result['url'] or 
-                    filtered_result['pdf_urls']):
-                    search_results.append(filtered_result)
+            # Process results, remembering which PDFs each evidence-exchange result links to.
+            # Results are serialized as soon as they are final; those awaiting the PDF check
+            # are kept as dicts until it has run.
+            search_results = []
+            pending_pdf_checks = []
+            async for result in primary_results:
+                try:
+                    filtered_result = {
+                        'content': get_search_context(result.get('content', ''), search_text),
+                        'url': get_first_url(result.get('embedded_urls')),
+                        'title': result.get('title', ''),
+                        'programs': result.get('programs', []),
+                        'ages_studied': result.get('ages_studied', []),
+                        'focus_population': result.get('focus_population', []),
+                        'domain': result.get('domain', ''),
+                        'subdomain_1': result.get('subdomain_1', ''),
+                        'subdomain_2': result.get('subdomain_2', ''),
+                        'subdomain_3': result.get('subdomain_3', ''),
+                        'resource_type': result.get('resource_type', ''),
+                        'pdf_urls': filter_pdf_urls(result.get('pdf_urls', [])),
+                        'found_in_pdf': False
+                    }
+
+                    # Only check PDFs if domain or resource_type is "evidence-exchange"
+                    # dict keeps the linked PDFs unique and in link order
+                    pdf_filenames = {}
+                    if is_evidence_exchange(result):
+                        for pdf_url in filtered_result['pdf_urls']:
+                            if not pdf_url:
+                                continue
+
+                            pdf_filename = extract_pdf_filename(pdf_url)
+                            if pdf_filename:
+                                pdf_filenames[pdf_filename] = None
+
+                    if (filtered_result['content'] or 
+                        filtered_result['url'] or 
+                        filtered_result['pdf_urls']):
+                        if pdf_filenames:
+                            pending_pdf_checks.append((len(search_results), pdf_filenames))
+                            search_results.append(filtered_result)
+                        else:
+                            search_results.append(orjson.dumps(filtered_result))
                     
-            except Exception as e:
-                logging.error(f"Error processing result: {str(e)}")
-                continue
+                except Exception as e:
+                    logging.error(f"Error processing result: {str(e)}")
+                    continue
+
+            # PDFs linked from the evidence-exchange results collected above
+            all_pdf_filenames = set().union(*(names.keys() for _, names in pending_pdf_checks))
+
+            # Map PDF filename -> content of its best matching chunk.
+            # Hits are matched to PDFs by basename here rather than with a server-side
+            # search.in(sourcefile, ...) filter: sourcefile holds the full blob path
+            # (uploads may sit under outputPath folders), so exact filename values would
+            # drop those PDFs, and it would also have to be filterable in the index schema.
+            # A rejected filter comes back as a 400 that search_single_index swallows,
+            # silently reporting no PDF matches.
+            pdf_matches = {}
+            if all_pdf_filenames:
+                secondary_results = await secondary_task
+                # Case-fold the needle once and each secondary content exactly once
+                needle = search_text.casefold()
+                for sec_result in secondary_results:
+                    sourcefile = sec_result.get('sourcefile') or ''
+                    pdf_filename = sourcefile.rpartition('/')[2]
+                    if pdf_filename not in all_pdf_filenames or pdf_filename in pdf_matches:
+                        continue
+                    sec_content = sec_result.get('content') or ''
+                    if sec_content and needle in sec_content.casefold():
+                        pdf_matches[pdf_filename] = sec_content
+        finally:
+            # Not needed when no result links to a PDF, or when processing failed
+            if not secondary_task.done():
+                secondary_task.cancel()
+
+        # Check all PDFs against the secondary results, then serialize those results too
+        for index, pdf_filenames in pending_pdf_checks:
+            filtered_result = search_results[index]
+            matched = pdf_filenames.keys() & pdf_matches.keys()
+            if matched:
+                # Report the first linked PDF that matched
+                pdf_filename = next(name for name in pdf_filenames if name in matched)
+                filtered_result['found_in_pdf'] = True
+                filtered_result['pdf_content'] = pdf_matches[pdf_filename]
+                logging.debug("Found search text in PDF content for %s", pdf_filename)
+            search_results[index] = orjson.dumps(filtered_result)
 
         response_data = {
-            "results": search_results,
             "total_count": total_count,
             "applied_filters": {
                 "programs": search_request.programs,
@@ -456,7 +491,7 @@ def search_function(req: func.HttpRequest) -> func.HttpResponse:
         }
 
         return func.HttpResponse(
-            json.dumps(response_data),
+            build_results_body(search_results, response_data),
             mimetype="application/json",
             status_code=200
         )
@@ -464,7 +499,7 @@ def search_function(req: func.HttpRequest) -> func.HttpResponse:
     except Exception as e:
         logging.error(f"Error in search function: {str(e)}")
         return func.HttpResponse(
-            json.dumps({
+            orjson.dumps({
                 "error": str(e),
                 "type": type(e).__name__,
                 "search_text": request_body.get('search_text', '') if 'request_body' in locals() else None,
@@ -1,5 +1,5 @@
 import os
-import json
+import orjson
 import logging
 import re
 import azure.functions as func
@@ -9,13 +9,15 @@ from azure.search.documents import SearchClient
 
 app = func.FunctionApp()
 
+_HTML_TAG_RE = re.compile(r'<[^>]+>')
+
 def get_search_context(text: str, search_text: str, context_chars: int = 300) -> str:
     """Returns context around where the search term was found."""
     if not text or not search_text:
         return ""
     
     text_str = str(text) if text is not None else ""
-    clean_text = re.sub(r'<[^>]+>', ' ', text_str)
+    clean_text = _HTML_TAG_RE.sub(' ', text_str)
     clean_text = ' '.join(clean_text.split())
     
     search_terms = search_text.lower().split()
@@ -56,7 +58,7 @@ def search_function(req: func.HttpRequest) -> func.HttpResponse:
 
         if not search_text:
             return func.HttpResponse(
-                json.dumps({"error": "search_text is required"}),
+                orjson.dumps({"error": "search_text is required"}),
                 status_code=400,
                 mimetype="application/json"
             )
@@ -97,14 +99,14 @@ def search_function(req: func.HttpRequest) -> func.HttpResponse:
         )
 
         return func.HttpResponse(
-            json.dumps(results, ensure_ascii=False, indent=2),
+            orjson.dumps(results, option=orjson.OPT_INDENT_2),
             mimetype="application/json"
         )
         
     except ValueError as ve:
         logging.error(f"Configuration error: {str(ve)}")
         return func.HttpResponse(
-            json.dumps({"error": str(ve)}),
+            orjson.dumps({"error": str(ve)}),
             status_code=400,
             mimetype="application/json"
         )
@@ -112,14 +114,14 @@ def search_function(req: func.HttpRequest) -> func.HttpResponse:
         error_msg = "No valid index names found in configuration"
         logging.error(error_msg)
         return func.HttpResponse(
-            json.dumps({"error": error_msg}),
+            orjson.dumps({"error": error_msg}),
             status_code=400,
             mimetype="application/json"
         )
     except Exception as e:
         logging.error(f"Search error: {str(e)}", exc_info=True)
         return func.HttpResponse(
-            json.dumps({"error": str(e)}),
+            orjson.dumps({"error": str(e)}),
             status_code=500,
             mimetype="application/json"
         )
\ No newline at end of file
@@ -0,0 +1,61 @@
+import os
+import threading
+from typing import Optional
+import requests
+from azure.core.exceptions import ResourceExistsError
+from azure.core.pipeline.transport import RequestsTransport
+from azure.identity import DefaultAzureCredential
+from azure.storage.blob import BlobServiceClient, ContainerClient
+
+_blob_service_lock = threading.Lock()
+_blob_service_client: Optional[BlobServiceClient] = None
+
+# Containers already known to exist in this worker
+_known_containers: set[str] = set()
+
+def get_blob_service_client() -> BlobServiceClient:
+    """Return the blob service client shared by every function in this worker, reusing its connection pool across invocations"""
+    global _blob_service_client
+    with _blob_service_lock:
+        if _blob_service_client is None:
+            # Size the pool so parallel block uploads and ranged downloads aren't capped by urllib3's default of 10
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_maxsize=32)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+
+            options = dict(
+                transport=RequestsTransport(session=session, session_owner=False),
+                # Stage bodies over 8MB as 4MB blocks that can be uploaded in parallel
+                max_single_put_size=8 * 1024 * 1024,
+                max_block_size=4 * 1024 * 1024,
+                # Download in 4MB ranges that can be fetched in parallel
+                max_single_get_size=4 * 1024 * 1024,
+                max_chunk_get_size=4 * 1024 * 1024
+            )
+
+            # Prefer an identity-based connection, which shares one credential and token cache
+            account_name = os.environ.get("AzureWebJobsStorage__accountName")
+            if account_name:
+                _blob_service_client = BlobServiceClient(
+                    account_url=f"https://{account_name}.blob.core.windows.net",
+                    credential=DefaultAzureCredential(),
+                    **options
+                )
+            else:
+                _blob_service_client = BlobServiceClient.from_connection_string(
+                    os.environ["AzureWebJobsStorage"],
+                    **options
+                )
+        return _blob_service_client
+
+def get_container_client(blob_service_client: BlobServiceClient, container_name: str) -> ContainerClient:
+    """Get a container client, creating the container only the first time this worker sees it"""
+    container_client = blob_service_client.get_container_client(container_name)
+    if container_name not in _known_containers:
+        try:
+            container_client.create_container()
+        except ResourceExistsError:
+            pass
+        _known_containers.add(container_name)
+    return container_client